@@ -1,20 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import json
+import mmap
 import os
 import random
+import re
+import stat
 import sys
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import requests
+import httpx
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，没装时回退到标准库 json
+    orjson = None
 
 from notifier import notify_serverchan, notify_wecom_text
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UrlCheck:
     url: str
     ok: bool
@@ -22,25 +34,26 @@ class UrlCheck:
     detail: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppCheckResult:
     name: str
     app_id: str
     store_url: str
     listed_at: Optional[datetime]
+    listed_at_epoch: Optional[float]
     check: UrlCheck
 
     @property
     def ok(self) -> bool:
         return self.check.ok
 
-    def summary_line(self) -> str:
+    def summary_line(self, now_epoch: Optional[float] = None) -> str:
         ok_str = "✅ 正常" if self.ok else "❌ 异常"
         dur = ""
-        if (not self.ok) and self.listed_at is not None:
-            now = datetime.now(timezone.utc)
-            delta = now - self.listed_at.astimezone(timezone.utc)
-            dur = f"（{format_timedelta(delta.total_seconds())}）"
+        if (not self.ok) and self.listed_at_epoch is not None:
+            if now_epoch is None:
+                now_epoch = time.time()
+            dur = f"（{format_days(_days_since(self.listed_at_epoch, now_epoch))}）"
         return f"{ok_str} {self.name}{dur}"
 
 
@@ -51,18 +64,40 @@ def _env(name: str, default: str = "") -> str:
     return v.strip()
 
 
+# 这些时区统一按 UTC+8 处理，其它一律按 UTC
+_UTC8_TZ_NAMES = frozenset({"Asia/Shanghai", "Asia/Chongqing", "Asia/Beijing", "Asia/Urumqi"})
+_TZ_NAME = _env("TZ_NAME", "Asia/Shanghai")
+_TZ_IS_UTC8 = _TZ_NAME in _UTC8_TZ_NAMES
+_TZ = timezone(timedelta(hours=8)) if _TZ_IS_UTC8 else timezone.utc
+
+
 def _ensure_parent_dir(path: str) -> None:
     parent = os.path.dirname(path)
     if parent:
         os.makedirs(parent, exist_ok=True)
 
 
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        # 普通非空文件直接让 orjson 解析映射的文件页；管道/FIFO/空文件走普通读取
+        if orjson is not None and stat.S_ISREG(st.st_mode) and st.st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return _loads(f.read())
+
+
 def load_state(state_file: str) -> Dict[str, Any]:
     if not state_file:
         return {}
     try:
-        with open(state_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _read_json(state_file)
         if isinstance(data, dict):
             return data
         return {}
@@ -72,36 +107,55 @@ def load_state(state_file: str) -> Dict[str, Any]:
         return {}
 
 
-def save_state(state_file: str, state: Dict[str, Any]) -> None:
+def save_state(state_file: str, state: Dict[str, Any], prev_digest: Optional[str] = None) -> None:
     if not state_file:
         return
+    # 各 App 状态与上次完全一致时不重写状态文件
+    if prev_digest is not None and state.get("_digest") == prev_digest:
+        return
     _ensure_parent_dir(state_file)
     tmp = state_file + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
-        f.write("\n")
+    if orjson is not None:
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
     os.replace(tmp, state_file)
 
 
-def _now_iso(tz_name: str) -> str:
-    if tz_name in ("Asia/Shanghai", "Asia/Chongqing", "Asia/Beijing", "Asia/Urumqi"):
-        offset = 8 * 3600
-    else:
-        offset = 0
-    dt = datetime.now(timezone.utc).astimezone(timezone(timedelta(seconds=offset)))
-    if offset == 8 * 3600:
+def _now_iso() -> str:
+    dt = datetime.now(_TZ)
+    if _TZ_IS_UTC8:
         return dt.strftime("%Y-%m-%d %H:%M:%S")
     return dt.strftime("%Y-%m-%d %H:%M:%S %z")
 
 
-def _sleep_jitter(base_seconds: float) -> None:
-    time.sleep(base_seconds + random.random() * 0.25)
+# 单条缓存：apps.json 未变化时（mtime/大小/前 64KB 内容一致）直接复用上次的校验结果
+_APPS_CACHE: Optional[Tuple[Tuple[str, int, int, str], List[Dict[str, Any]]]] = None
+_APPS_HEAD_BYTES = 64 * 1024
 
 
 def load_apps(apps_file: str) -> List[Dict[str, Any]]:
-    with open(apps_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
+    # 返回的列表可能被缓存复用，调用方不要修改其中的元素
+    global _APPS_CACHE
+    with open(apps_file, "rb") as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            # 管道/FIFO 只能读一次，也没有可靠的 mtime，不缓存
+            return _parse_apps(_loads(f.read()))
+        head = f.read(_APPS_HEAD_BYTES)
+        key = (os.path.abspath(apps_file), st.st_mtime_ns, st.st_size, hashlib.sha256(head).hexdigest())
+        if _APPS_CACHE is not None and _APPS_CACHE[0] == key:
+            return _APPS_CACHE[1]
+        raw = head + f.read()
+    apps = _parse_apps(_loads(raw))
+    _APPS_CACHE = (key, apps)
+    return apps
+
+
+def _parse_apps(data: Any) -> List[Dict[str, Any]]:
     if not isinstance(data, list):
         raise ValueError("apps.json 顶层必须是数组")
 
@@ -131,12 +185,36 @@ def load_apps(apps_file: str) -> List[Dict[str, Any]]:
                 "app_id": app_id,
                 "store_url": store_url,
                 "listed_at": listed_at,
+                "listed_at_epoch": listed_at.timestamp() if listed_at is not None else None,
             }
         )
 
     return normalized
 
 
+# 覆盖 listed_at 的常见写法：YYYY-MM-DD[ HH:MM:SS[ +HHMM]]，不匹配时再走 strptime
+_LISTED_AT_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})(?:\s+(\d{2}):(\d{2}):(\d{2})(?:\s+([+-])(\d{2})([0-5]\d))?)?"
+)
+
+
+def _parse_listed_at_fast(s: str) -> Optional[datetime]:
+    m = _LISTED_AT_RE.fullmatch(s)
+    if m is None:
+        return None
+    y, mo, d, h, mi, sec, sign, tz_h, tz_m = m.groups()
+    try:
+        tz = _TZ
+        if sign is not None:
+            offset = timedelta(hours=int(tz_h), minutes=int(tz_m))
+            tz = timezone(-offset if sign == "-" else offset)
+        if h is None:
+            return datetime(int(y), int(mo), int(d), tzinfo=tz)
+        return datetime(int(y), int(mo), int(d), int(h), int(mi), int(sec), tzinfo=tz)
+    except ValueError:
+        return None
+
+
 def parse_listed_at(value: Any) -> Optional[datetime]:
     if value is None:
         return None
@@ -144,11 +222,9 @@ def parse_listed_at(value: Any) -> Optional[datetime]:
     if not s:
         return None
 
-    tz_name = _env("TZ_NAME", "Asia/Shanghai")
-    if tz_name in ("Asia/Shanghai", "Asia/Chongqing", "Asia/Beijing", "Asia/Urumqi"):
-        tz = timezone(timedelta(hours=8))
-    else:
-        tz = timezone.utc
+    dt = _parse_listed_at_fast(s)
+    if dt is not None:
+        return dt
 
     fmts = [
         "%Y-%m-%d %H:%M:%S %z",
@@ -159,26 +235,35 @@ def parse_listed_at(value: Any) -> Optional[datetime]:
         try:
             dt = datetime.strptime(s, fmt)
             if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=tz)
+                dt = dt.replace(tzinfo=_TZ)
             return dt
         except Exception:
             continue
     raise ValueError(f"listed_at 格式不支持: {s!r}，建议用 'YYYY-MM-DD HH:MM:SS +0800' 或 'YYYY-MM-DD'")
 
 
-def format_timedelta(total_seconds: float) -> str:
-    seconds = int(total_seconds)
+def _days_since(epoch: float, now_epoch: float) -> int:
+    seconds = int(now_epoch - epoch)
     if seconds < 0:
-        seconds = 0
-    days = seconds // 86400
+        return 0
+    return seconds // 86400
+
+
+def format_days(days: int) -> str:
     if days <= 0:
         return "不足1天"
     return f"{days}天"
 
 
 def format_reason(http_status: Optional[int], detail: str) -> str:
+    # detail 只在网络异常时展示，且最多展示 200 个字符；截断后的结果作为缓存 key
+    d = (detail or "").strip()[:200].rstrip() if http_status is None else ""
+    return _format_reason_cached(http_status, d)
+
+
+@functools.lru_cache(maxsize=512)
+def _format_reason_cached(http_status: Optional[int], d: str) -> str:
     if http_status is None:
-        d = (detail or "").strip()
         if d:
             return f"网络异常/超时（{d}）"
         return "网络异常/超时"
@@ -198,231 +283,351 @@ def format_reason(http_status: Optional[int], detail: str) -> str:
     return f"{http_status}（页面不可访问）"
 
 
-def store_page_probe(url: str, timeout_seconds: int = 10) -> Tuple[bool, Optional[int], str]:
-    headers = {
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_6) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
-    }
+HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_6) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
+}
+
+
+def _new_client() -> httpx.AsyncClient:
+    # 所有 App 共用一个客户端；HTTP/2 下对 apps.apple.com 的探测复用同一条 TLS 连接多路并发
+    return httpx.AsyncClient(
+        http2=True,
+        headers=HEADERS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
+class ProbeThrottle:
+    """限制同时在途的探测请求数，并按 rps 匀速放行（rps<=0 表示不限速）。"""
+
+    def __init__(self, max_concurrency: int, rps: float) -> None:
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_at = 0.0
+
+    async def _wait_turn(self) -> None:
+        if self._interval <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        at = max(now, self._next_at)
+        self._next_at = at + self._interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    async def __aenter__(self) -> "ProbeThrottle":
+        await self._sem.acquire()
+        try:
+            await self._wait_turn()
+        except BaseException:
+            self._sem.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self._sem.release()
+
+
+# 这些状态码重试也不会变化（404/410 是下架强信号），直接结束重试
+NON_RETRYABLE_STATUSES = frozenset({404, 410, 451})
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After 可能是秒数，也可能是 HTTP-date
+    if not value:
+        return None
+    v = value.strip()
+    # 只认 ASCII 数字；"²" 之类的 Unicode 数字 isdigit() 也为真但 float() 会失败
+    if v.isascii() and v.isdigit():
+        return float(v)
     try:
-        resp = requests.get(url, headers=headers, timeout=timeout_seconds, allow_redirects=True)
-        http_status = resp.status_code
-        if http_status != 200:
-            if http_status in (404, 410):
-                return False, http_status, f"页面 HTTP {http_status}（强信号：可能下架/该区不可用）"
-            return False, http_status, f"页面 HTTP {http_status}（可能是临时网络/限流/风控）"
-        return True, http_status, "页面可访问"
-    except Exception as e:
-        return False, None, f"页面探测异常: {e}"
+        dt = parsedate_to_datetime(v)
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
+
+
+def _retry_delay(attempt: int, base_seconds: float, cap_seconds: float, retry_after: Optional[float]) -> float:
+    # Full Jitter：random(0, min(cap, base * 2**attempt))，避免所有 App 同步重试
+    if retry_after is not None:
+        return min(retry_after, cap_seconds)
+    return random.uniform(0, min(cap_seconds, base_seconds * (2**attempt)))
+
 
+# 只有这些 HEAD 结果可以直接采信；其它状态（405/403/400/429/5xx 等）CDN 或风控
+# 对 HEAD 和 GET 的处理可能不同，一律再用 GET 确认
+HEAD_CONCLUSIVE_STATUSES = frozenset({200, 404, 410})
 
-def check_one_app(app: Dict[str, Any], retries: int, retry_backoff_seconds: float, timeout_seconds: int) -> AppCheckResult:
+
+async def _request_status(
+    client: httpx.AsyncClient, throttle: ProbeThrottle, method: str, url: str, timeout_seconds: int
+) -> Tuple[int, Optional[float]]:
+    # 只看状态码；stream 模式下不读取响应体
+    async with throttle, client.stream(method, url, timeout=timeout_seconds) as resp:
+        retry_after = None
+        if resp.status_code == 429:
+            retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+        return resp.status_code, retry_after
+
+
+async def store_page_probe(
+    client: httpx.AsyncClient, throttle: ProbeThrottle, url: str, timeout_seconds: int = 10
+) -> Tuple[bool, Optional[int], str, Optional[float]]:
+    try:
+        http_status, retry_after = await _request_status(client, throttle, "HEAD", url, timeout_seconds)
+        if http_status not in HEAD_CONCLUSIVE_STATUSES:
+            http_status, retry_after = await _request_status(client, throttle, "GET", url, timeout_seconds)
+    except httpx.TimeoutException:
+        return False, None, f"页面探测超时（{timeout_seconds}s）", None
+    except Exception as e:
+        return False, None, f"页面探测异常: {e}", None
+
+    if http_status != 200:
+        if http_status in (404, 410):
+            return False, http_status, f"页面 HTTP {http_status}（强信号：可能下架/该区不可用）", None
+        return False, http_status, f"页面 HTTP {http_status}（可能是临时网络/限流/风控）", retry_after
+    return True, http_status, "页面可访问", None
+
+
+async def check_one_app(
+    client: httpx.AsyncClient,
+    throttle: ProbeThrottle,
+    app: Dict[str, Any],
+    retries: int,
+    retry_backoff_seconds: float,
+    retry_max_seconds: float,
+    timeout_seconds: int,
+) -> AppCheckResult:
     name = app["name"]
     app_id = app["app_id"]
     store_url = app["store_url"]
     listed_at = app.get("listed_at", None)
+    listed_at_epoch = app.get("listed_at_epoch", None)
 
     last: Optional[UrlCheck] = None
     for attempt in range(retries + 1):
-        ok, http_status, detail = store_page_probe(store_url, timeout_seconds=timeout_seconds)
+        ok, http_status, detail, retry_after = await store_page_probe(
+            client, throttle, store_url, timeout_seconds=timeout_seconds
+        )
         last = UrlCheck(url=store_url, ok=ok, http_status=http_status, detail=detail)
-        if ok:
+        if ok or http_status in NON_RETRYABLE_STATUSES:
             break
         if attempt < retries:
-            _sleep_jitter(retry_backoff_seconds * (attempt + 1))
+            await asyncio.sleep(_retry_delay(attempt, retry_backoff_seconds, retry_max_seconds, retry_after))
 
     return AppCheckResult(
         name=name,
         app_id=app_id,
         store_url=store_url,
         listed_at=listed_at,
+        listed_at_epoch=listed_at_epoch,
         check=last if last is not None else UrlCheck(url=store_url, ok=False, http_status=None, detail="未知错误"),
     )
 
 
-def format_report(results: List[AppCheckResult], tz_name: str) -> str:
-    lines: List[str] = []
-    total = len(results)
-    bad = [r for r in results if not r.ok]
-    ok_cnt = total - len(bad)
-    lines.append(f"App Store 上架状态监控 - {_now_iso(tz_name)}")
-    lines.append(f"汇总：总数 {total}，正常 {ok_cnt}，异常 {len(bad)}")
-    lines.append("")
-    for r in results:
-        lines.append(r.summary_line())
-        c = r.check
-        status = "OK" if c.ok else "FAIL"
-        hs = "" if c.http_status is None else f" http={c.http_status}"
-        lines.append(f"- {status}{hs} {c.detail}")
-        lines.append(f"- URL {r.store_url}")
-        if r.listed_at is not None:
-            lines.append(f"- 上架时间 listed_at: {r.listed_at.strftime('%Y-%m-%d %H:%M:%S %z')}")
-        lines.append("")
-    return "\n".join(lines).strip()
-
-
-def format_bad_only_report(results: List[AppCheckResult], tz_name: str) -> str:
-    bad = [r for r in results if not r.ok]
-    lines: List[str] = []
-    lines.append(f"App Store 上架状态监控 - {_now_iso(tz_name)}")
-    lines.append(f"异常 {len(bad)} / 总数 {len(results)}")
-    lines.append("")
-    for r in bad:
-        c = r.check
-        dur = ""
-        if r.listed_at is not None:
-            now = datetime.now(timezone.utc)
-            delta = now - r.listed_at.astimezone(timezone.utc)
-            dur = f"（{format_timedelta(delta.total_seconds())}）"
-        lines.append(f"❌ 异常 {r.name}{dur}")
-        lines.append(f"- 地址：{r.store_url}")
-        if r.listed_at is not None:
-            lines.append(f"- 上架时间：{r.listed_at.strftime('%Y-%m-%d')}")
-        lines.append(f"- 原因：{format_reason(c.http_status, c.detail)}")
-        lines.append("")
-    return "\n".join(lines).strip()
+def _listed_duration(r: AppCheckResult, now_epoch: float) -> str:
+    if r.listed_at_epoch is None:
+        return ""
+    return f"（{format_days(_days_since(r.listed_at_epoch, now_epoch))}）"
 
 
-def _app_state_key(app_id: str, store_url: str) -> str:
-    return f"{app_id}|{store_url}"
+def _fmt_app_block(r: AppCheckResult, now_epoch: float) -> str:
+    c = r.check
+    status = "OK" if c.ok else "FAIL"
+    hs = "" if c.http_status is None else f" http={c.http_status}"
+    block = f"{r.summary_line(now_epoch)}\n- {status}{hs} {c.detail}\n- URL {r.store_url}"
+    if r.listed_at is not None:
+        block += f"\n- 上架时间 listed_at: {r.listed_at.strftime('%Y-%m-%d %H:%M:%S %z')}"
+    return block
 
 
-def format_new_bad_only_report(
-    results: List[AppCheckResult],
-    tz_name: str,
-    prev_state: Dict[str, Any],
-) -> Tuple[str, List[AppCheckResult], List[AppCheckResult]]:
-    prev_apps = prev_state.get("apps", {})
-    if not isinstance(prev_apps, dict):
-        prev_apps = {}
+def _fmt_bad_block(r: AppCheckResult, now_epoch: float) -> str:
+    c = r.check
+    block = f"❌ 异常 {r.name}{_listed_duration(r, now_epoch)}\n- 地址：{r.store_url}"
+    if r.listed_at is not None:
+        block += f"\n- 上架时间：{r.listed_at.strftime('%Y-%m-%d')}"
+    return f"{block}\n- 原因：{format_reason(c.http_status, c.detail)}"
 
-    bad = [r for r in results if not r.ok]
-    new_bad: List[AppCheckResult] = []
-    for r in bad:
-        key = _app_state_key(r.app_id, r.store_url)
-        prev = prev_apps.get(key, {})
-        prev_ok = True
-        if isinstance(prev, dict):
-            prev_ok = bool(prev.get("ok", True))
-        if prev_ok:
-            new_bad.append(r)
 
-    lines: List[str] = []
-    lines.append(f"App Store 上架状态监控 - {_now_iso(tz_name)}")
-    lines.append(f"新增异常 {len(new_bad)} / 当前异常 {len(bad)} / 总数 {len(results)}")
-    lines.append("")
+def _app_state_key(app_id: str, store_url: str) -> str:
+    return f"{app_id}|{store_url}"
 
-    if not new_bad:
-        lines.append("本次没有新增异常（异常项可能已在之前的运行中告警过）。")
-        if bad:
-            lines.append("")
-            lines.append("当前仍异常的 App：")
-            for r in bad:
-                c = r.check
-                lines.append(f"- {r.name}：{format_reason(c.http_status, c.detail)}")
-        lines.append("")
-        return "\n".join(lines).strip(), new_bad, bad
-
-    for r in new_bad:
-        c = r.check
-        dur = ""
-        if r.listed_at is not None:
-            now = datetime.now(timezone.utc)
-            delta = now - r.listed_at.astimezone(timezone.utc)
-            dur = f"（{format_timedelta(delta.total_seconds())}）"
-        lines.append(f"❌ 异常 {r.name}{dur}")
-        lines.append(f"- 地址：{r.store_url}")
-        if r.listed_at is not None:
-            lines.append(f"- 上架时间：{r.listed_at.strftime('%Y-%m-%d')}")
-        lines.append(f"- 原因：{format_reason(c.http_status, c.detail)}")
-        lines.append("")
 
-    return "\n".join(lines).strip(), new_bad, bad
+def _prev_apps_by_key(prev_state: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    # 状态文件里用字符串 key，内存里统一换成 (app_id, store_url)
+    prev_apps = prev_state.get("apps", {})
+    if not isinstance(prev_apps, dict):
+        return {}
+    return {
+        (str(v.get("app_id", "")), str(v.get("store_url", ""))): v
+        for v in prev_apps.values()
+        if isinstance(v, dict)
+    }
 
 
-def build_state(results: List[AppCheckResult]) -> Dict[str, Any]:
+def build_all(
+    results: List[AppCheckResult],
+    now_epoch: float,
+    prev_apps: Dict[Tuple[str, str], Dict[str, Any]],
+) -> Tuple[str, str, str, List[AppCheckResult], List[AppCheckResult], Dict[str, Any]]:
+    # 一次遍历 results，同时产出：完整报告、仅异常报告、仅新增异常报告、异常列表、新增异常列表、状态
+    full_blocks: List[str] = []
+    bad_blocks: List[str] = []
+    new_bad_blocks: List[str] = []
+    bad: List[AppCheckResult] = []
+    new_bad: List[AppCheckResult] = []
     apps: Dict[str, Any] = {}
     for r in results:
-        key = _app_state_key(r.app_id, r.store_url)
-        apps[key] = {
+        c = r.check
+        full_blocks.append(_fmt_app_block(r, now_epoch))
+        apps[_app_state_key(r.app_id, r.store_url)] = {
             "name": r.name,
             "app_id": r.app_id,
             "store_url": r.store_url,
-            "ok": r.ok,
-            "http_status": r.check.http_status,
-            "detail": r.check.detail,
+            "ok": c.ok,
+            "http_status": c.http_status,
+            "detail": c.detail,
         }
-    return {
+        if c.ok:
+            continue
+        block = _fmt_bad_block(r, now_epoch)
+        bad.append(r)
+        bad_blocks.append(block)
+        if bool(prev_apps.get((r.app_id, r.store_url), {}).get("ok", True)):
+            new_bad.append(r)
+            new_bad_blocks.append(block)
+
+    title = f"App Store 上架状态监控 - {_now_iso()}"
+    total = len(results)
+    full_head = f"{title}\n汇总：总数 {total}，正常 {total - len(bad)}，异常 {len(bad)}"
+    full_report = "\n\n".join([full_head, *full_blocks]).strip()
+    bad_report = "\n\n".join([f"{title}\n异常 {len(bad)} / 总数 {total}", *bad_blocks]).strip()
+
+    new_bad_head = f"{title}\n新增异常 {len(new_bad)} / 当前异常 {len(bad)} / 总数 {total}"
+    if new_bad:
+        new_bad_report = "\n\n".join([new_bad_head, *new_bad_blocks]).strip()
+    else:
+        body = "本次没有新增异常（异常项可能已在之前的运行中告警过）。"
+        if bad:
+            still_bad = "\n".join(f"- {r.name}：{format_reason(r.check.http_status, r.check.detail)}" for r in bad)
+            body = f"{body}\n\n当前仍异常的 App：\n{still_bad}"
+        new_bad_report = f"{new_bad_head}\n\n{body}".strip()
+
+    state = {
         "updated_at_utc": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S %z"),
         "apps": apps,
+        "_digest": state_digest(apps),
     }
+    return full_report, bad_report, new_bad_report, bad, new_bad, state
+
+
+def state_digest(apps: Dict[str, Any]) -> str:
+    # 只对各 App 状态取摘要，updated_at_utc 每次都会变，不参与比较
+    payload = json.dumps(apps, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_NOTIFY_CHANNEL = _env("NOTIFY_CHANNEL", "wecom").lower()
+_WECOM_WEBHOOK_URL = _env("WECOM_WEBHOOK_URL")
+_SERVERCHAN_SENDKEY = _env("SERVERCHAN_SENDKEY")
+_SERVERCHAN_TITLE = _env("SERVERCHAN_TITLE", "App Store 监控告警")
+
+
+def _send_wecom(report: str) -> Tuple[bool, str]:
+    res = notify_wecom_text(webhook_url=_WECOM_WEBHOOK_URL, content=report)
+    return res.ok, res.detail
+
+
+def _send_serverchan(report: str) -> Tuple[bool, str]:
+    res = notify_serverchan(sendkey=_SERVERCHAN_SENDKEY, title=_SERVERCHAN_TITLE, desp=report)
+    return res.ok, res.detail
+
+
+CHANNELS: Dict[str, Callable[[str], Tuple[bool, str]]] = {
+    "wecom": _send_wecom,
+    "serverchan": _send_serverchan,
+}
 
 
 def notify(report: str) -> Tuple[bool, str]:
-    channel = _env("NOTIFY_CHANNEL", "wecom").lower()
-    if channel == "wecom":
-        webhook = _env("WECOM_WEBHOOK_URL")
-        res = notify_wecom_text(webhook_url=webhook, content=report)
-        return res.ok, res.detail
-    if channel == "serverchan":
-        sendkey = _env("SERVERCHAN_SENDKEY")
-        title = _env("SERVERCHAN_TITLE", "App Store 监控告警")
-        res = notify_serverchan(sendkey=sendkey, title=title, desp=report)
-        return res.ok, res.detail
-    return False, f"未知 NOTIFY_CHANNEL: {channel}"
-
-
-def main() -> int:
+    fn = CHANNELS.get(_NOTIFY_CHANNEL)
+    if fn is None:
+        return False, f"未知 NOTIFY_CHANNEL: {_NOTIFY_CHANNEL}"
+    return fn(report)
+
+
+async def _notify_and_save(
+    report: str, state_file: str, state: Dict[str, Any], prev_digest: Optional[str]
+) -> Tuple[bool, str]:
+    # 发通知（网络）和写状态文件（磁盘）互不依赖，放到线程里同时进行
+    (ok, detail), _ = await asyncio.gather(
+        asyncio.to_thread(notify, report),
+        asyncio.to_thread(save_state, state_file, state, prev_digest),
+    )
+    return ok, detail
+
+
+async def main() -> int:
     apps_file = _env("APPS_FILE", "monitor/apps.json")
     retries = int(_env("RETRIES", "2"))
     retry_backoff_seconds = float(_env("RETRY_BACKOFF_SECONDS", "1.0"))
+    retry_max_seconds = float(_env("RETRY_MAX_SECONDS", "30"))
     timeout_seconds = int(_env("TIMEOUT_SECONDS", "10"))
-    tz_name = _env("TZ_NAME", "Asia/Shanghai")
+    max_concurrency = max(1, int(_env("MAX_CONCURRENCY", "8")))
+    rps = float(_env("RPS", "5"))
     alert_mode = _env("ALERT_MODE", "always").lower()  # always | transition
     state_file = _env("STATE_FILE", "")
 
     apps = load_apps(apps_file)
-    results: List[AppCheckResult] = []
-    for app in apps:
-        results.append(
+    throttle = ProbeThrottle(max_concurrency=max_concurrency, rps=rps)
+    async with _new_client() as client:
+        tasks = [
             check_one_app(
+                client,
+                throttle,
                 app=app,
                 retries=retries,
                 retry_backoff_seconds=retry_backoff_seconds,
+                retry_max_seconds=retry_max_seconds,
                 timeout_seconds=timeout_seconds,
             )
-        )
-
-    report = format_report(results, tz_name=tz_name)
-    bad = [r for r in results if not r.ok]
+            for app in apps
+        ]
+        results: List[AppCheckResult] = list(await asyncio.gather(*tasks))
+
+    prev_state = load_state(state_file)
+    prev_digest = prev_state.get("_digest")
+    report, bad_report, new_bad_report, bad, new_bad, state = build_all(
+        results, now_epoch=time.time(), prev_apps=_prev_apps_by_key(prev_state)
+    )
 
     if bad:
         if alert_mode == "transition":
-            prev_state = load_state(state_file)
-            send_report, new_bad, _all_bad = format_new_bad_only_report(results, tz_name=tz_name, prev_state=prev_state)
             if new_bad:
-                ok, detail = notify(send_report)
-                save_state(state_file, build_state(results))
-                print(send_report)
+                ok, detail = await _notify_and_save(new_bad_report, state_file, state, prev_digest)
+                print(new_bad_report)
                 print("")
                 print(f"notify: ok={ok} detail={detail}")
                 return 0 if ok else 2
             ok, detail = True, "skip notify (no new bad)"
-            print(send_report)
+            save_state(state_file, state, prev_digest)
+            print(new_bad_report)
         else:
-            bad_report = format_bad_only_report(results, tz_name=tz_name)
-            ok, detail = notify(bad_report)
+            ok, detail = await _notify_and_save(bad_report, state_file, state, prev_digest)
             print(bad_report)
         print("")
         print(f"notify: ok={ok} detail={detail}")
-        save_state(state_file, build_state(results))
         return 0 if alert_mode == "transition" else 2
 
     print(report)
-    save_state(state_file, build_state(results))
+    save_state(state_file, state, prev_digest)
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
 
 
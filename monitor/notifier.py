@@ -1,22 +1,49 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+# 通知走同一个 Session，复用 TCP/TLS 连接；重试由调用方决定，这里关闭 urllib3 的自动重试
+_NOTIFY_SESSION = requests.Session()
+_NOTIFY_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    pool_block=False,
+    max_retries=Retry(total=0, connect=0, read=0, redirect=3),
+)
+_NOTIFY_SESSION.mount("https://", _NOTIFY_ADAPTER)
+_NOTIFY_SESSION.mount("http://", _NOTIFY_ADAPTER)
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class NotifyResult:
     ok: bool
     detail: str
 
 
+_NEWLINE_RE = re.compile(r"\r\n?")
+_BLANK_LINE_RE = re.compile(r"^[^\S\n]+$", re.MULTILINE)
+_LINE_END_RE = re.compile(r"(?<=[^\n])$", re.MULTILINE)
+
+
+def _to_serverchan_markdown(text: str) -> str:
+    # Server酱 desp 按 Markdown 渲染；单个换行在 Markdown 里可能会被折叠成空格
+    # 这里用“行尾两个空格 + 换行”强制每行换行显示（纯空白行清空）
+    s = _NEWLINE_RE.sub("\n", text)
+    s = _BLANK_LINE_RE.sub("", s)
+    return _LINE_END_RE.sub("  ", s)
+
+
 def notify_wecom_text(webhook_url: str, content: str, timeout_seconds: int = 10) -> NotifyResult:
     if not webhook_url:
         return NotifyResult(ok=False, detail="WECOM_WEBHOOK_URL 为空")
 
     try:
-        resp = requests.post(
+        resp = _NOTIFY_SESSION.post(
             webhook_url,
             json={"msgtype": "text", "text": {"content": content}},
             timeout=timeout_seconds,
@@ -38,22 +65,10 @@ def notify_serverchan(sendkey: str, title: str, desp: str, timeout_seconds: int
     if not sendkey:
         return NotifyResult(ok=False, detail="SERVERCHAN_SENDKEY 为空")
 
-    def _to_serverchan_markdown(text: str) -> str:
-        # Server酱 desp 按 Markdown 渲染；单个换行在 Markdown 里可能会被折叠成空格
-        # 这里用“行尾两个空格 + 换行”强制每行换行显示
-        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
-        out_lines = []
-        for line in lines:
-            if line.strip() == "":
-                out_lines.append("")
-            else:
-                out_lines.append(line + "  ")
-        return "\n".join(out_lines)
-
     url = f"https://sctapi.ftqq.com/{sendkey}.send"
     try:
         desp_md = _to_serverchan_markdown(desp)
-        resp = requests.post(url, data={"title": title, "desp": desp_md}, timeout=timeout_seconds)
+        resp = _NOTIFY_SESSION.post(url, data={"title": title, "desp": desp_md}, timeout=timeout_seconds)
         if resp.status_code != 200:
             return NotifyResult(ok=False, detail=f"Server酱返回状态码异常: {resp.status_code}, body={resp.text[:2000]}")
         try: